@@ -6,20 +6,28 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from pydantic import BaseModel
 import uvicorn
-import json
+import asyncio
+import orjson
 import re
 import uuid
 import sys
-import traceback
+import logging
 import time
 import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Optional, List
 from dotenv import load_dotenv
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 
 # LangChain Imports
 from src.helper import download_hugging_face_embeddings
+from src.semantic_cache import SemanticCache
+from src.retrieval_cache import RetrievalCache
 from langchain_pinecone import PineconeVectorStore
+from pinecone.grpc import PineconeGRPC
 from langchain_community.chat_models import ChatOllama
 from langchain.chains import create_retrieval_chain, create_history_aware_retriever
 from langchain.chains.combine_documents import create_stuff_documents_chain
@@ -29,31 +37,142 @@ from langchain_core.messages import HumanMessage, AIMessage
 import database as db
 
 # --- Initialization ---
-print("Starting SafeMind initialization...", file=sys.stderr)
-
-print("Loading environment variables...", file=sys.stderr)
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("safemind")
+
+logger.info("Starting SafeMind initialization...")
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
-    print("ERROR: SECRET_KEY not found in .env file!", file=sys.stderr)
+    logger.error("ERROR: SECRET_KEY not found in .env file!")
     sys.exit(1)
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 if not PINECONE_API_KEY:
-    print("ERROR: PINECONE_API_KEY not found in .env file!", file=sys.stderr)
+    logger.error("ERROR: PINECONE_API_KEY not found in .env file!")
     sys.exit(1)
 os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
 
 # Initialize database
-print("Initializing database...", file=sys.stderr)
+logger.info("Initializing database...")
 db.init_database()
 
+# --- Prompt Templates ---
+# Templates are built once; the per-request system text is passed in as {system_prompt}
+CRISIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}"),
+    MessagesPlaceholder("chat_history"),
+    ("human", "{input}"),
+])
+
+SOCIAL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}"),
+    ("human", "{input}"),
+])
+
+CONVERSATIONAL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}"),
+    MessagesPlaceholder("chat_history"),
+    ("human", "{input}"),
+])
+
+RAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "{system_prompt}\nContext from knowledge base:\n{context}"),
+    MessagesPlaceholder("chat_history"),
+    ("human", "{input}"),
+])
+
+# --- Models ---
+# Loaded once per worker process by the app lifespan, so the process that
+# supervises multiple uvicorn workers never loads them itself
+embeddings = None
+docsearch = None
+response_cache = None
+retrieval_cache = None
+chatModel = None
+crisis_chain = None
+social_chain = None
+conversational_chain = None
+question_answer_chain = None
+
+def load_models():
+    """Load embeddings, Pinecone, the chat model and the prompt chains"""
+    global embeddings, docsearch, response_cache, retrieval_cache, chatModel
+    global crisis_chain, social_chain, conversational_chain, question_answer_chain
+
+    logger.info("Loading embeddings...")
+    try:
+        # Split the cores between worker processes instead of every worker using all of them
+        workers = int(os.getenv("WEB_CONCURRENCY", 1))
+        num_threads = max(1, (os.cpu_count() or 1) // workers) if workers > 1 else None
+        embeddings = download_hugging_face_embeddings(num_threads=num_threads)
+        # One throwaway forward pass so the first user query doesn't pay for session warmup
+        embeddings.embed_query("warmup")
+        logger.info("✓ Embeddings loaded")
+    except Exception as e:
+        logger.error("ERROR loading embeddings: %s", e)
+        raise
+
+    logger.info("Connecting to Pinecone...")
+    try:
+        index_name = "mental-health-chatbot"
+        # gRPC client keeps one long-lived HTTP/2 channel for all queries
+        pc = PineconeGRPC(api_key=PINECONE_API_KEY)
+        pinecone_index = pc.Index(index_name)
+        docsearch = PineconeVectorStore(index=pinecone_index, embedding=embeddings)
+        logger.info("✓ Pinecone connected")
+    except Exception as e:
+        logger.error("ERROR connecting to Pinecone: %s", e)
+        logger.error("Make sure your Pinecone index 'mental-health-chatbot' exists!")
+        raise
+
+    logger.info("Initializing semantic cache...")
+    response_cache = SemanticCache(dimension=384, threshold=0.92)
+    logger.info("✓ Semantic cache initialized")
+
+    # Optional cross-worker cache of retrieval results; disabled without REDIS_URL
+    retrieval_cache = RetrievalCache(url=os.getenv("REDIS_URL"))
+    if retrieval_cache.enabled:
+        logger.info("✓ Retrieval cache connected to redis")
+
+    logger.info("Initializing ChatOllama...")
+    # Make sure ollama is running and the model is downloaded
+    chatModel = ChatOllama(model="llama3.2:1b")
+    logger.info("✓ Chat model initialized")
+
+    crisis_chain = CRISIS_PROMPT | chatModel
+    social_chain = SOCIAL_PROMPT | chatModel
+    conversational_chain = CONVERSATIONAL_PROMPT | chatModel
+    question_answer_chain = create_stuff_documents_chain(chatModel, RAG_PROMPT)
+    logger.info("✓ Prompt chains built")
+
+    logger.info("SafeMind initialization complete!")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_models()
+    yield
+
 # Initialize FastAPI app
-app = FastAPI(title="SafeMind Mental Health Chatbot")
+app = FastAPI(title="SafeMind Mental Health Chatbot", lifespan=lifespan)
 
 # Middleware
-app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
+class AppSessionMiddleware(SessionMiddleware):
+    """Session middleware that passes static asset requests straight through,
+    so they skip the cookie signature check and re-signing."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/static/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(AppSessionMiddleware, secret_key=SECRET_KEY)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -66,38 +185,96 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# Load Embeddings & Pinecone
-print("Loading embeddings...", file=sys.stderr)
-try:
-    embeddings = download_hugging_face_embeddings()
-    print("✓ Embeddings loaded", file=sys.stderr)
-except Exception as e:
-    print(f"ERROR loading embeddings: {str(e)}", file=sys.stderr)
-    sys.exit(1)
 
-print("Connecting to Pinecone...", file=sys.stderr)
-try:
-    index_name = "mental-health-chatbot"
-    docsearch = PineconeVectorStore.from_existing_index(
-        index_name=index_name,
-        embedding=embeddings
-    )
-    print("✓ Pinecone connected", file=sys.stderr)
-except Exception as e:
-    print(f"ERROR connecting to Pinecone: {str(e)}", file=sys.stderr)
-    print("Make sure your Pinecone index 'mental-health-chatbot' exists!", file=sys.stderr)
-    sys.exit(1)
 
-print("Initializing retriever...", file=sys.stderr)
-retriever = docsearch.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-print("✓ Retriever initialized", file=sys.stderr)
+# --- Intent Keywords ---
+
+EMOTIONAL_KEYWORDS = [
+    'feel', 'feeling', 'sad', 'depressed', 'anxious', 'worried', 'stress', 'stressed',
+    'overwhelmed', 'scared', 'afraid', 'lonely', 'struggling', 'broken', 'hurt',
+    'angry', 'frustrated', 'disappointed', 'devastated', 'heartbroken', 'numb', 'empty',
+    'suicidal', 'harm', 'hurt myself', 'hurting myself', 'harming myself', "can't take it", "can't handle", 'breaking down',
+    'panic', 'panicking', 'crying', 'cry', 'exhausted', 'tired', 'depressing', 'terrible'
+]
+
+TECHNICAL_KEYWORDS = [
+    'how to', 'how do i', 'help me', 'can you explain', 'debug', 'code', 'error',
+    'problem', 'issue', 'fix', 'solution', 'advice on', 'tips for', 'steps', 'process',
+    'way to', 'method', 'technique', 'approach', 'strategy', 'algorithm', 'implement',
+    'build', 'create', 'develop', 'learn', 'study', 'understand'
+]
+
+KNOWLEDGE_PREFIXES = (
+    'what is', 'what are', 'who is', 'who are', 'explain', 'tell me about', 'define'
+)
 
-print("Initializing ChatOllama...", file=sys.stderr)
-# Make sure ollama is running and the model is downloaded
-chatModel = ChatOllama(model="llama3.2:1b") 
-print("✓ Chat model initialized", file=sys.stderr)
+VENTING_KEYWORDS = [
+    'just', 'ugh', 'i hate', 'seriously', 'honestly', 'actually', 'literally',
+    'can you imagine', 'no joke', 'can you believe', 'i mean', 'so annoying', 'ridiculous'
+]
+
+SOCIAL_KEYWORDS = [
+    'hi', 'hello', 'hey', 'greetings', 'morning', 'afternoon', 'evening',
+    'how are you', 'how are things', 'how is used', 'whats up', "what's up",
+    'ok', 'okay', 'cool', 'nice', 'great', 'thanks', 'thank you', 'thx', 'got it', 'sure'
+]
+
+URGENT_KEYWORDS = [
+    'crisis', 'emergency', 'immediate', 'right now', 'asap', 'urgent', 'please help',
+    'dying', 'dead', 'kill myself', 'killing myself', 'end it', 'give up', 'giving up',
+    'hopeless', 'no point'
+]
+
+NEGATIVE_KEYWORDS = ['not', 'no', "can't", "don't", "won't", 'fail', 'bad']
+POSITIVE_KEYWORDS = ['great', 'good', 'happy', 'better', 'amazing']
+WELLNESS_KEYWORDS = ['sleep', 'exercise', 'eat', 'diet', 'fitness']
+ADVICE_KEYWORDS = ['advice', 'should i']
+
+# Category ids index into the per-message counts array
+INTENT_CATEGORIES = (
+    EMOTIONAL_KEYWORDS, TECHNICAL_KEYWORDS, VENTING_KEYWORDS, SOCIAL_KEYWORDS,
+    URGENT_KEYWORDS, NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS, WELLNESS_KEYWORDS,
+    ADVICE_KEYWORDS,
+)
+(EMOTIONAL, TECHNICAL, VENTING, SOCIAL,
+ URGENT, NEGATIVE, POSITIVE, WELLNESS, ADVICE) = range(len(INTENT_CATEGORIES))
+
+# Single distress and crisis words also match common inflections ('hopelessness',
+# 'urgently', 'hurting') so whole-word matching doesn't lose recall on them.
+# The suffix list is closed so 'dead' still doesn't match 'deadline'. Inflected
+# phrases are listed explicitly instead ('killing myself'), so 'end it' stays
+# off 'ended it with my ex'.
+INFLECTED_CATEGORIES = frozenset({EMOTIONAL, URGENT})
+INFLECTION_SUFFIX = r'(?:s|es|ed|ing|ly|ness|ful)?'
+
+def keyword_pattern(keyword, inflect=False):
+    """Regex for one keyword; with inflect, a single word may take a suffix."""
+    if inflect and ' ' not in keyword:
+        return re.escape(keyword) + INFLECTION_SUFFIX
+    return re.escape(keyword)
+
+def compile_keywords(keywords, inflect=False):
+    """
+    Compile a keyword list into whole-word alternation regexes.
+    Single words and multi-word phrases get separate sweeps so that
+    overlapping hits (e.g. 'hurt' and 'hurt myself') are both counted.
+    Each keyword is a named group, so a match reports which keyword it
+    hit rather than the inflected text ('hurt' and 'hurting' count once).
+    """
+    indexed = sorted(enumerate(keywords), key=lambda item: len(item[1]), reverse=True)
+    words = [(i, kw) for i, kw in indexed if ' ' not in kw]
+    phrases = [(i, kw) for i, kw in indexed if ' ' in kw]
+    return tuple(
+        re.compile(r'\b(?:' + '|'.join(
+            f'(?P<k{i}>{keyword_pattern(kw, inflect)})' for i, kw in group
+        ) + r')\b')
+        for group in (words, phrases) if group
+    )
 
-print("SafeMind initialization complete!", file=sys.stderr)
+INTENT_PATTERNS = tuple(
+    compile_keywords(keywords, inflect=category in INFLECTED_CATEGORIES)
+    for category, keywords in enumerate(INTENT_CATEGORIES)
+)
 
 
 # --- Helper Functions ---
@@ -128,50 +305,21 @@ def analyze_user_intent(message):
     """Analyze user message to determine intent and sentiment"""
     message_lower = message.lower()
 
-    emotional_keywords = [
-        'feel', 'feeling', 'sad', 'depressed', 'anxious', 'worried', 'stress', 'stressed',
-        'overwhelmed', 'scared', 'afraid', 'lonely', 'struggling', 'broken', 'hurt',
-        'angry', 'frustrated', 'disappointed', 'devastated', 'heartbroken', 'numb', 'empty',
-        'suicidal', 'harm', 'hurt myself', "can't take it", "can't handle", 'breaking down',
-        'panic', 'panicking', 'crying', 'cry', 'exhausted', 'tired', 'depressing', 'terrible'
-    ]
-
-    technical_keywords = [
-        'how to', 'how do i', 'help me', 'can you explain', 'debug', 'code', 'error',
-        'problem', 'issue', 'fix', 'solution', 'advice on', 'tips for', 'steps', 'process',
-        'way to', 'method', 'technique', 'approach', 'strategy', 'algorithm', 'implement',
-        'build', 'create', 'develop', 'learn', 'study', 'understand'
+    # Regex sweeps per category; each distinct keyword counts once
+    counts = [
+        sum(len({match.lastgroup for match in pattern.finditer(message_lower)}) for pattern in patterns)
+        for patterns in INTENT_PATTERNS
     ]
 
-    knowledge_keywords = [
-        'what is', 'what are', 'who is', 'who are', 'explain', 'tell me about', 'define'
-    ]
-
-    venting_keywords = [
-        'just', 'ugh', 'i hate', 'seriously', 'honestly', 'actually', 'literally',
-        'can you imagine', 'no joke', 'can you believe', 'i mean', 'so annoying', 'ridiculous'
-    ]
-
-    social_keywords = [
-        'hi', 'hello', 'hey', 'greetings', 'morning', 'afternoon', 'evening',
-        'how are you', 'how are things', 'how is used', 'whats up', "what's up",
-        'ok', 'okay', 'cool', 'nice', 'great', 'thanks', 'thank you', 'thx', 'got it', 'sure'
-    ]
-    
-    urgent_keywords = [
-        'crisis', 'emergency', 'immediate', 'right now', 'asap', 'urgent', 'please help',
-        'dying', 'dead', 'kill myself', 'end it', 'give up', 'hopeless', 'no point'
-    ]
-
-    emotional_count = sum(1 for kw in emotional_keywords if kw in message_lower)
-    technical_count = sum(1 for kw in technical_keywords if kw in message_lower)
-    venting_count = sum(1 for kw in venting_keywords if kw in message_lower)
-    urgent_count = sum(1 for kw in urgent_keywords if kw in message_lower)
-    knowledge_count = sum(1 for kw in knowledge_keywords if message_lower.startswith(kw))
+    emotional_count = counts[EMOTIONAL]
+    technical_count = counts[TECHNICAL]
+    venting_count = counts[VENTING]
+    urgent_count = counts[URGENT]
+    knowledge_count = 1 if message_lower.startswith(KNOWLEDGE_PREFIXES) else 0
     
     # Check for social intent: Short message + social keywords + NO distress indicators
     is_short = len(message.split()) <= 10  # Max 10 words for social check
-    has_social_kw = any(kw in message_lower for kw in social_keywords)
+    has_social_kw = counts[SOCIAL] > 0
     no_distress = emotional_count == 0 and urgent_count == 0 and technical_count == 0
     
     # Priority order for intent detection
@@ -185,21 +333,20 @@ def analyze_user_intent(message):
         intent = 'technical'
     elif emotional_count > technical_count and emotional_count > 0:
         intent = 'emotional'
-    elif 'advice' in message_lower or 'should i' in message_lower:
+    elif counts[ADVICE] > 0:
         intent = 'advice'
-    elif any(kw in message_lower for kw in ['sleep', 'exercise', 'eat', 'diet', 'fitness']):
+    elif counts[WELLNESS] > 0:
         intent = 'wellness'
     else:
         intent = 'venting' # Default to venting if no other intent is detected
 
-    negative_indicators = ['not', 'no', "can't", "don't", "won't", 'fail', 'bad']
-    negative_count = sum(1 for ind in negative_indicators if ind in message_lower)
+    negative_count = counts[NEGATIVE]
 
     if urgent_count > 0:
         sentiment = 'urgent'
     elif emotional_count > 3 and negative_count > 0:
         sentiment = 'negative'
-    elif any(pos in message_lower for pos in ['great', 'good', 'happy', 'better', 'amazing']):
+    elif counts[POSITIVE] > 0:
         sentiment = 'positive'
     else:
         sentiment = 'neutral'
@@ -218,6 +365,177 @@ def analyze_user_intent(message):
         'emotional_level': emotional_level
     }
 
+# --- NDJSON Stream Events ---
+DONE_EVENT = b'{"type":"done"}\n'
+
+def token_event(content):
+    """Encode a token event without building an intermediate dict"""
+    return b'{"type":"token","content":' + orjson.dumps(content) + b'}\n'
+
+def status_event(content):
+    """Encode a status event"""
+    return b'{"type":"status","content":' + orjson.dumps(content) + b'}\n'
+
+async def stream_chain(chain, inputs, max_buffered=64):
+    """
+    Run chain.astream in a background task and yield text chunks from a queue,
+    so LLM decoding overlaps with serializing and sending the previous chunk.
+    The producer is cancelled if the consumer stops early (client disconnect).
+    """
+    queue = asyncio.Queue(maxsize=max_buffered)
+
+    async def producer():
+        try:
+            is_text = None
+            async for chunk in chain.astream(inputs):
+                if is_text is None:
+                    # Chat models yield message chunks; the stuff-documents chain yields strings
+                    is_text = isinstance(chunk, str)
+                await queue.put(chunk if is_text else chunk.content)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    task = asyncio.create_task(producer())
+    try:
+        while (item := await queue.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+def retrieve_documents(query, query_vector, k):
+    """Top-k (Document, score) pairs for the query, served from redis when cached."""
+    docs_and_scores = retrieval_cache.get(query, k)
+    if docs_and_scores is None:
+        docs_and_scores = docsearch.similarity_search_by_vector_with_score(query_vector, k=k)
+        retrieval_cache.set(query, k, docs_and_scores)
+    return docs_and_scores
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking database helper in a worker thread"""
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+# --- User Profile Cache ---
+# Profiles are read on every chat turn; keep them in-process instead of the session cookie
+USER_PROFILE_CACHE_SIZE = 10000
+USER_PROFILE_CACHE = OrderedDict()
+
+def cache_user_profile(user):
+    """Store the prompt-relevant fields of a user row in the LRU profile cache"""
+    profile = {
+        'name': user['name'],
+        'age': user['age'],
+        'gender': user['gender'],
+        'location': user['location']
+    }
+    USER_PROFILE_CACHE[user['id']] = profile
+    USER_PROFILE_CACHE.move_to_end(user['id'])
+    if len(USER_PROFILE_CACHE) > USER_PROFILE_CACHE_SIZE:
+        USER_PROFILE_CACHE.popitem(last=False)
+    return profile
+
+async def get_user_profile(user_id):
+    """Return the cached profile for a user, loading it from the database on a miss"""
+    profile = USER_PROFILE_CACHE.get(user_id)
+    if profile is not None:
+        USER_PROFILE_CACHE.move_to_end(user_id)
+        return profile
+    user = await run_db(db.get_user_by_id, user_id)
+    if not user:
+        return None
+    return cache_user_profile(user)
+
+# Intents answered from the knowledge base (RAG branch). Only these are served from
+# the semantic cache, and only on a chat's first message: every prompt includes the
+# chat history, so a reply written mid-conversation can refer to things said there.
+# Crisis messages always go to the model.
+CACHEABLE_INTENTS = frozenset({'knowledge', 'technical', 'advice', 'wellness'})
+
+# Intents whose chats get a fixed title instead of the first message's words
+# (crisis text should not be echoed in the chat list)
+INTENT_CHAT_TITLES = {
+    'emergency': 'Crisis support',
+}
+
+# --- Crisis Resources ---
+INDIA_LOCATION_RE = re.compile(
+    r'india|delhi|mumbai|bangalore|pune|chennai|kolkata|hyderabad', re.IGNORECASE
+)
+
+INDIA_CRISIS_INSTRUCTIONS = (
+    "SPECIFIC FOR INDIA: You MUST mention 'Tele MANAS', the verified 24/7 national mental health helpline. "
+    "The number is 14416 or 1-800-891-4416. Website: https://telemanas.mohfw.gov.in/home "
+    "Urge them to call this free service immediately. "
+)
+
+# --- Precomputed Replies ---
+# Splits a precomputed reply into word-sized chunks, preserving whitespace
+REPLAY_TOKEN_RE = re.compile(r'\s*\S+|\s+')
+
+async def replay_text(text, delay=0.0):
+    """Yield a precomputed reply in word-sized chunks, optionally paced like model output"""
+    for content in REPLAY_TOKEN_RE.findall(text):
+        yield content
+        if delay:
+            await asyncio.sleep(delay)
+
+# Instant replies for the most common social messages, keyed by normalized text
+SOCIAL_CANNED = {
+    "hi": "Hi {name}! How are you feeling today?",
+    "hello": "Hello {name}! How are you feeling today?",
+    "hey": "Hey {name}! How are you feeling today?",
+    "good morning": "Good morning, {name}! How are you feeling today?",
+    "good afternoon": "Good afternoon, {name}! How is your day going?",
+    "good evening": "Good evening, {name}! How was your day?",
+    "thanks": "You're welcome, {name}. I'm here whenever you need me.",
+    "thank you": "You're welcome, {name}. I'm here whenever you need me.",
+    "thx": "You're welcome, {name}. I'm here whenever you need me.",
+    "ok": "Alright. Is there anything else on your mind?",
+    "okay": "Alright. Is there anything else on your mind?",
+    "got it": "Great. Is there anything else on your mind?",
+    "cool": "Glad to hear it. Is there anything else on your mind?",
+}
+
+def normalize_social_message(message):
+    """Normalize a message for SOCIAL_CANNED lookups"""
+    return message.lower().strip('!?. ')
+
+def get_canned_social_reply(message, name):
+    """Return a canned reply for an exact-match social message, or None"""
+    template = SOCIAL_CANNED.get(normalize_social_message(message))
+    if template is None:
+        return None
+    return template.format(name=name or "friend")
+
+# --- Password Hashing ---
+password_hasher = PasswordHasher()
+
+def hash_password(password):
+    """Hash a password with argon2id"""
+    return password_hasher.hash(password)
+
+def verify_password(password_hash, password):
+    """Check a password against an argon2 hash or a legacy werkzeug PBKDF2 hash"""
+    if password_hash.startswith('pbkdf2:'):
+        return check_password_hash(password_hash, password)
+    try:
+        return password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(password_hash):
+    """Legacy PBKDF2 hashes and outdated argon2 parameters are upgraded on login"""
+    return password_hash.startswith('pbkdf2:') or password_hasher.check_needs_rehash(password_hash)
+
+# --- Signup Validation ---
+EMAIL_RE = re.compile(r'^[^@]+@[^@]+\.[^@]+$')
+PASSWORD_MIN_LENGTH = 8
+AGE_MIN = 13
+AGE_MAX = 120
+
 # --- Pydantic Models ---
 class SignupModel(BaseModel):
     email: str
@@ -253,7 +571,7 @@ async def signup(data: SignupModel, request: Request):
         email = data.email.strip().lower()
         password = data.password
         name = data.name.strip()
-        age = data.age
+        age = data.age.strip()
         location = data.location.strip()
         gender = data.gender
 
@@ -262,46 +580,46 @@ async def signup(data: SignupModel, request: Request):
             return JSONResponse({"success": False, "message": "All fields are required"}, status_code=400)
 
         # Email validation
-        email_regex = r'^[^@]+@[^@]+\.[^@]+$'
-        if not re.match(email_regex, email):
+        if not EMAIL_RE.match(email):
             return JSONResponse({"success": False, "message": "Invalid email format"}, status_code=400)
 
         # Password validation
-        if len(password) < 8:
-            return JSONResponse({"success": False, "message": "Password must be at least 8 characters"}, status_code=400)
+        if len(password) < PASSWORD_MIN_LENGTH:
+            return JSONResponse({"success": False, "message": f"Password must be at least {PASSWORD_MIN_LENGTH} characters"}, status_code=400)
 
-        # Age validation
-        try:
-            age_int = int(age)
-            if age_int < 13 or age_int > 120:
-                return JSONResponse({"success": False, "message": "Age must be between 13 and 120"}, status_code=400)
-        except:
+        # Age validation (digit check first so bad input never raises)
+        if not age.isdecimal():
             return JSONResponse({"success": False, "message": "Invalid age"}, status_code=400)
+        if not AGE_MIN <= int(age) <= AGE_MAX:
+            return JSONResponse({"success": False, "message": f"Age must be between {AGE_MIN} and {AGE_MAX}"}, status_code=400)
 
         # Check if user exists
-        if db.get_user_by_email(email):
+        if await run_db(db.get_user_by_email, email):
             return JSONResponse({"success": False, "message": "Email already registered"}, status_code=400)
 
-        # Hash password
-        password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        # Hash password (off the event loop, argon2 is deliberately CPU-heavy)
+        password_hash = await asyncio.to_thread(hash_password, password)
 
         # Create user
-        user_id = db.create_user(email, name, age, location, gender, password_hash)
+        user_id = await run_db(db.create_user, email, name, age, location, gender, password_hash)
         
         if not user_id:
             return JSONResponse({"success": False, "message": "Failed to create user"}, status_code=500)
 
         # Set session
         request.session['user_id'] = user_id
-        request.session['user_name'] = name
-        request.session['user_age'] = age
-        request.session['user_gender'] = gender
-        request.session['user_location'] = location
         request.session['authenticated'] = True
+        cache_user_profile({
+            'id': user_id,
+            'name': name,
+            'age': age,
+            'gender': gender,
+            'location': location
+        })
 
         # Create initial chat
         chat_id = str(uuid.uuid4())
-        db.create_chat(chat_id, user_id, 'New Conversation')
+        await run_db(db.create_chat, chat_id, user_id, 'New Conversation')
 
         return {
             "success": True,
@@ -310,8 +628,7 @@ async def signup(data: SignupModel, request: Request):
             "user_id": user_id
         }
     except Exception as e:
-        print(f"Signup error: {str(e)}", file=sys.stderr)
-        traceback.print_exc()
+        logger.exception("Signup error: %s", e)
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
 @app.post("/login")
@@ -324,31 +641,32 @@ async def login(data: LoginModel, request: Request):
             return JSONResponse({"success": False, "message": "Email and password required"}, status_code=400)
 
         # Get user
-        user = db.get_user_by_email(email)
+        user = await run_db(db.get_user_by_email, email)
         if not user:
             return JSONResponse({"success": False, "message": "Invalid email or password"}, status_code=401)
 
         # Check password
-        if not check_password_hash(user['password_hash'], password):
+        if not await asyncio.to_thread(verify_password, user['password_hash'], password):
             return JSONResponse({"success": False, "message": "Invalid email or password"}, status_code=401)
 
+        if password_needs_rehash(user['password_hash']):
+            new_hash = await asyncio.to_thread(hash_password, password)
+            await run_db(db.update_user_password_hash, user['id'], new_hash)
+
         # Set session
         request.session['user_id'] = user['id']
-        request.session['user_name'] = user['name']
-        request.session['user_age'] = user['age']
-        request.session['user_gender'] = user['gender']
-        request.session['user_location'] = user['location']
         request.session['authenticated'] = True
+        cache_user_profile(user)
 
         # Get user's chats
-        chats = db.get_user_chats(user['id'])
+        chats = await run_db(db.get_user_chats, user['id'])
         
         # Get or create a chat
         if chats:
             chat_id = chats[0]['id']
         else:
             chat_id = str(uuid.uuid4())
-            db.create_chat(chat_id, user['id'], 'New Conversation')
+            await run_db(db.create_chat, chat_id, user['id'], 'New Conversation')
 
         return {
             "success": True,
@@ -357,8 +675,7 @@ async def login(data: LoginModel, request: Request):
             "user_id": user['id']
         }
     except Exception as e:
-        print(f"Login error: {str(e)}", file=sys.stderr)
-        traceback.print_exc()
+        logger.exception("Login error: %s", e)
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
 @app.get("/chats")
@@ -370,7 +687,8 @@ async def get_chats(request: Request):
          return JSONResponse({"success": False, "message": e.detail}, status_code=e.status_code)
     
     # Get chats from database
-    chats = db.get_user_chats(user_id)
+    chats = await run_db(db.get_user_chats, user_id)
+    profile = await get_user_profile(user_id) or {}
     user_chats = [
         {
             'id': chat['id'],
@@ -385,9 +703,9 @@ async def get_chats(request: Request):
         "success": True, 
         "chats": user_chats,
         "user_profile": {
-            "name": request.session.get('user_name', 'User'),
-            "age": request.session.get('user_age', ''),
-            "gender": request.session.get('user_gender', '')
+            "name": profile.get('name', 'User'),
+            "age": profile.get('age', ''),
+            "gender": profile.get('gender', '')
         }
     }
 
@@ -402,7 +720,7 @@ async def create_chat(request: Request):
     chat_id = str(uuid.uuid4())
     
     # Create chat in database
-    db.create_chat(chat_id, user_id, 'New Chat')
+    await run_db(db.create_chat, chat_id, user_id, 'New Chat')
     
     return {"success": True, "chat_id": chat_id}
 
@@ -415,27 +733,17 @@ async def delete_chat(chat_id: str, request: Request):
          return JSONResponse({"success": False, "message": e.detail}, status_code=e.status_code)
     
     # Verify chat belongs to user
-    chat = db.get_chat_by_id(chat_id)
+    chat = await run_db(db.get_chat_by_id, chat_id)
     if not chat or chat['user_id'] != user_id:
         return JSONResponse({"success": False, "message": "Chat not found"}, status_code=404)
     
     # Delete chat and messages from database
     try:
-        conn = db.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Delete messages first (foreign key constraint)
-        cursor.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
-        
-        # Delete chat
-        cursor.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
-        
-        conn.commit()
-        conn.close()
+        await run_db(db.delete_chat, chat_id)
         
         return {"success": True, "message": "Chat deleted"}
     except Exception as e:
-        print(f"Error deleting chat: {str(e)}", file=sys.stderr)
+        logger.error("Error deleting chat: %s", e)
         return JSONResponse({"success": False, "message": "Failed to delete chat"}, status_code=500)
 
 @app.get("/chats/{chat_id}")
@@ -447,19 +755,20 @@ async def get_chat_history(chat_id: str, request: Request):
          return JSONResponse({"success": False, "message": e.detail}, status_code=e.status_code)
     
     # Get chat from database and verify ownership
-    chat = db.get_chat_by_id(chat_id)
+    chat = await run_db(db.get_chat_by_id, chat_id)
     if not chat or chat['user_id'] != user_id:
         return JSONResponse({"success": False, "message": "Chat not found"}, status_code=404)
     
-    # Get messages from database
-    messages = db.get_chat_messages(chat_id)
-    message_list = [
-        {
-            'role': msg['role'],
-            'content': msg['content']
-        }
-        for msg in messages
-    ]
+    # Get messages from database, keeping only the fields the client renders
+    def load_message_list():
+        return [
+            {
+                'role': msg['role'],
+                'content': msg['content']
+            }
+            for msg in db.iter_chat_messages(chat_id)
+        ]
+    message_list = await run_db(load_message_list)
         
     return {
         "success": True, 
@@ -474,29 +783,29 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
             return JSONResponse({"success": False, "message": "Please login first"}, status_code=400)
 
         user_id = request.session.get('user_id')
-        age = request.session.get('user_age')
-        gender = request.session.get('user_gender')
-        location = request.session.get('user_location', '')
-        name = request.session.get('user_name', '')
+        profile = await get_user_profile(user_id)
+        if not profile:
+            return JSONResponse({"success": False, "message": "Please login first"}, status_code=400)
+
+        age = profile['age']
+        gender = profile['gender']
+        location = profile['location'] or ''
+        name = profile['name'] or ''
         
         if not chat_id:
-            print("ERROR: Chat ID string is missing", file=sys.stderr)
+            logger.error("Chat ID string is missing")
             return JSONResponse({"success": False, "message": "Chat ID required"}, status_code=400)
 
         # Verify chat exists and belongs to user
-        chat = db.get_chat_by_id(chat_id)
+        chat = await run_db(db.get_chat_by_id, chat_id)
         if not chat or chat['user_id'] != user_id:
-            print(f"ERROR: Chat {chat_id} not found or unauthorized for user {user_id}", file=sys.stderr)
+            logger.error("Chat %s not found or unauthorized for user %s", chat_id, user_id)
             return JSONResponse({"success": False, "message": "Chat not found"}, status_code=404)
        
         # Load chat history from database
-        messages = db.get_chat_messages(chat_id)
+        messages = await run_db(db.get_chat_messages, chat_id)
         
-        # Update title if first message
-        if not messages:
-            title_words = msg.split()[:5]
-            new_title = " ".join(title_words) + "..."
-            db.update_chat_title(chat_id, new_title)
+        is_first_message = not messages
         
         # Convert history to LangChain message objects
         langchain_history = []
@@ -508,17 +817,14 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
 
         # Streaming Generator Function
         async def generate():
-            full_response = ""
+            response_parts = []
             
             # Step 1: Analyze Intent
-            yield json.dumps({"type": "status", "content": "Analyzing intent..."}) + "\n"
-            # time.sleep(0.5) # Blocking sleep in async function is bad, but for short duration/UX it's acceptable or use asyncio.sleep
-            import asyncio
-            await asyncio.sleep(0.5)
+            yield status_event("Analyzing intent...")
 
             t_start_intent = time.time()
             analysis = analyze_user_intent(msg)
-            print(f"[TIMING] Intent Analysis took: {time.time() - t_start_intent:.4f}s", file=sys.stderr)
+            logger.debug("[TIMING] Intent Analysis took: %.4fs", time.time() - t_start_intent)
             
             # Formulate System Prompt
             system_prompt_text, cot_instruction = get_system_prompt(age, gender, location, name)
@@ -526,20 +832,40 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
             sentiment = analysis['sentiment']
             emotional_level = analysis['emotional_level']
             
+            # Canned replies for plain greetings/acknowledgements skip the model entirely
+            canned_reply = None
+            if analysis['intent'] == 'social':
+                canned_reply = get_canned_social_reply(msg, name)
+
+            # Semantic cache: replay a recent answer to a near-identical question asked
+            # with no prior history. The query vector is also what the RAG branch retrieves with.
+            query_vector = None
+            cached_response = None
+            use_response_cache = not langchain_history
+            # Only these intents are embedded at all; other turns never pay for a forward pass
+            if canned_reply is None and analysis['intent'] in CACHEABLE_INTENTS:
+                query_vector = await asyncio.to_thread(embeddings.embed_query, msg)
+                if use_response_cache:
+                    cached_response = response_cache.lookup(user_id, query_vector, analysis['intent'])
+
+            if canned_reply is not None:
+                async for content in replay_text(canned_reply, delay=0.02):
+                    response_parts.append(content)
+                    yield token_event(content)
+
+            elif cached_response is not None:
+                logger.debug("[CACHE] Semantic cache hit for intent=%s", intent_upper)
+                async for content in replay_text(cached_response):
+                    response_parts.append(content)
+                    yield token_event(content)
+
             # Emergency Crisis Handling - Inject Resources FIRST
-            if analysis['intent'] == 'emergency':
-                print(f"🚨 EMERGENCY INTENT DETECTED for user in {location}", file=sys.stderr)
+            elif analysis['intent'] == 'emergency':
+                logger.warning("🚨 EMERGENCY INTENT DETECTED for user in %s", location)
                 
                 # Now let LLM provide empathetic follow-up
-                is_india = location and any(kw in location.lower() for kw in ['india', 'delhi', 'mumbai', 'bangalore', 'pune', 'chennai', 'kolkata', 'hyderabad'])
-                
-                india_instructions = ""
-                if is_india:
-                    india_instructions = (
-                        "SPECIFIC FOR INDIA: You MUST mention 'Tele MANAS', the verified 24/7 national mental health helpline. "
-                        "The number is 14416 or 1-800-891-4416. Website: https://telemanas.mohfw.gov.in/home "
-                        "Urge them to call this free service immediately. "
-                    )
+                is_india = bool(location) and INDIA_LOCATION_RE.search(location) is not None
+                india_instructions = INDIA_CRISIS_INSTRUCTIONS if is_india else ""
 
                 crisis_system_prompt = (
                     "You are SafeMind, a compassionate mental health assistant. "
@@ -552,17 +878,13 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
                     f"\nUser Name: {name}, Location: {location}"
                 )
                 
-                crisis_prompt = ChatPromptTemplate.from_messages([
-                    ("system", crisis_system_prompt),
-                    MessagesPlaceholder("chat_history"),
-                    ("human", "{input}"),
-                ])
-                
-                chain = crisis_prompt | chatModel
-                async for chunk in chain.astream({"input": msg, "chat_history": langchain_history}):
-                    content = chunk.content
-                    full_response += content
-                    yield json.dumps({"type": "token", "content": content}) + "\n"
+                async for content in stream_chain(crisis_chain, {
+                    "system_prompt": crisis_system_prompt,
+                    "input": msg,
+                    "chat_history": langchain_history
+                }):
+                    response_parts.append(content)
+                    yield token_event(content)
                     # await asyncio.sleep(0) # Yield control
                 
                 # Done handling emergency
@@ -579,16 +901,9 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
                     f"\nUser Name: {name}"
                 )
                 
-                social_prompt = ChatPromptTemplate.from_messages([
-                    ("system", social_system_prompt),
-                    ("human", "{input}"),
-                ])
-                
-                chain = social_prompt | chatModel
-                async for chunk in chain.astream({"input": msg}):
-                    content = chunk.content
-                    full_response += content
-                    yield json.dumps({"type": "token", "content": content}) + "\n"
+                async for content in stream_chain(social_chain, {"system_prompt": social_system_prompt, "input": msg}):
+                    response_parts.append(content)
+                    yield token_event(content)
                     
                 # Done handling social
             
@@ -604,64 +919,49 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
                     conversational_system_prompt = f"""{system_prompt_text}
 {intent_context}"""
                     
-                    conversational_prompt = ChatPromptTemplate.from_messages([
-                        ("system", conversational_system_prompt),
-                        MessagesPlaceholder("chat_history"),
-                        ("human", "{input}"),
-                    ])
-                    
-                    chain = conversational_prompt | chatModel
-                    
                     # Stream the response
-                    async for chunk in chain.astream({"input": msg, "chat_history": langchain_history}):
-                        content = chunk.content
-                        full_response += content
-                        yield json.dumps({"type": "token", "content": content}) + "\n"
+                    async for content in stream_chain(conversational_chain, {
+                        "system_prompt": conversational_system_prompt,
+                        "input": msg,
+                        "chat_history": langchain_history
+                    }):
+                        response_parts.append(content)
+                        yield token_event(content)
                         
                 else:
                     # RAG Chain in Manual Steps for transparency and score logging
                     
-                    rephrased_msg = msg
-                    
                     # 2. Retrieve with Scores
-                    # docsearch is the PineconeVectorStore instance
-                    yield json.dumps({"type": "status", "content": "Searching knowledge base..."}) + "\n"
+                    # docsearch is the PineconeVectorStore instance; reuse the query
+                    # embedding computed for the semantic cache instead of re-embedding.
+                    # The Pinecone and redis clients are synchronous, so query from a worker thread
+                    yield status_event("Searching knowledge base...")
                     t_start_retrieve = time.time()
-                    docs_and_scores = docsearch.similarity_search_with_score(rephrased_msg, k=5)
-                    print(f"[TIMING] Vector Retrieval took: {time.time() - t_start_retrieve:.4f}s", file=sys.stderr)
-                    
-                    # 3. Log RAG Details to Terminal (Backend Only)
-                    print("\n" + "="*50, file=sys.stderr)
-                    print("===== RAG RETRIEVAL START =====", file=sys.stderr)
-                    print(f"Query: {msg}", file=sys.stderr)
-                    print(f"Intent={intent_upper} | Sentiment={sentiment} | Emotion={emotional_level}", file=sys.stderr)
+                    docs_and_scores = await asyncio.to_thread(retrieve_documents, msg, query_vector, 5)
+                    logger.debug("[TIMING] Vector Retrieval took: %.4fs", time.time() - t_start_retrieve)
                     
-                    total_score = 0
-                    retrieved_docs = []
+                    retrieved_docs = [doc for doc, score in docs_and_scores]
                     
-                    for i, (doc, score) in enumerate(docs_and_scores):
-                        source = doc.metadata.get('source', 'Unknown source')
-                        # Preview content safely
-                        preview = doc.page_content.strip().replace('\n', ' ')[:150]
-                        print(f"[Doc {i+1}] Source={source} | Score={score:.4f} | Preview=\"{preview}...\"", file=sys.stderr)
-                        
-                        retrieved_docs.append(doc)
-                    
-                    # 4. Compute Confidence Score
+                    # 3. Compute Confidence Score
                     # Use MAX score (best match) rather than average, as one good doc is enough.
-                    confidence_score = 0.0
-                    if docs_and_scores:
-                        # Assuming sorted, but max() is safer
-                        confidence_score = max(score for doc, score in docs_and_scores)
+                    confidence_score = max((score for doc, score in docs_and_scores), default=0.0)
                     
-                    print(f"RAG Confidence Score (Max): {confidence_score:.4f}", file=sys.stderr)
-                    print("===== RAG RETRIEVAL END =====", file=sys.stderr)
-                    print("="*50 + "\n", file=sys.stderr)
+                    # 4. Log RAG Details (Backend Only, set LOG_LEVEL=DEBUG)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("===== RAG RETRIEVAL START =====")
+                        logger.debug("Query: %s", msg)
+                        logger.debug("Intent=%s | Sentiment=%s | Emotion=%s", intent_upper, sentiment, emotional_level)
+                        for i, (doc, score) in enumerate(docs_and_scores):
+                            source = doc.metadata.get('source', 'Unknown source')
+                            preview = doc.page_content.strip().replace('\n', ' ')[:150]
+                            logger.debug('[Doc %d] Source=%s | Score=%.4f | Preview="%s..."', i + 1, source, score, preview)
+                        logger.debug("RAG Confidence Score (Max): %.4f", confidence_score)
+                        logger.debug("===== RAG RETRIEVAL END =====")
                     
                     # 5. Low Confidence Handling
                     confidence_warning = ""
                     if confidence_score < 0.35:
-                        print("!!! WARNING: Low RAG Confidence. Applying conservative constraints.", file=sys.stderr)
+                        logger.warning("Low RAG confidence (%.4f). Applying conservative constraints.", confidence_score)
                         confidence_warning = (
                             "\nWARNING: The retrieved context has low relevance confidence. "
                             "Do NOT make strong medical claims or factual assertions unless strictly supported by the context. "
@@ -670,50 +970,59 @@ async def chat(request: Request, msg: str = Form(...), chat_id: str = Form(...))
                         )
 
                     # 6. Generate Response (Streaming)
-                    # Create Stuff Documents Chain manually to stream response
                     full_system_prompt = f"""{system_prompt_text}
 {intent_context}
-{confidence_warning}
-Context from knowledge base:
-{{context}}"""
-
-                    qa_prompt = ChatPromptTemplate.from_messages([
-                        ("system", full_system_prompt),
-                        MessagesPlaceholder("chat_history"),
-                        ("human", "{input}"),
-                    ])
-                    
-                    question_answer_chain = create_stuff_documents_chain(chatModel, qa_prompt)
+{confidence_warning}"""
                     
                     # We invoke/stream the chain with the retrieves docs directly
-                    async for chunk in question_answer_chain.astream({
+                    async for content in stream_chain(question_answer_chain, {
+                        "system_prompt": full_system_prompt,
                         "input": msg, 
                         "chat_history": langchain_history,
                         "context": retrieved_docs
                     }):
-                        content = chunk # stuff chain yields string chunks directly usually
-                        
-                        if hasattr(chunk, 'content'):
-                            content = chunk.content
-                        else:
-                            content = str(chunk)
-                            
-                        full_response += content
-                        yield json.dumps({"type": "token", "content": content}) + "\n"
+                        response_parts.append(content)
+                        yield token_event(content)
             
             # Completion
-            # Save messages to database
-            db.add_message(chat_id, 'user', msg)
-            db.add_message(chat_id, 'assistant', full_response)
+            full_response = "".join(response_parts)
+
+            # Retitle the chat from the first message (saved with the turn below)
+            new_title = None
+            if is_first_message:
+                new_title = INTENT_CHAT_TITLES.get(analysis['intent'])
+                if new_title is None:
+                    new_title = " ".join(msg.split()[:5]) + "..."
+            if use_response_cache and cached_response is None and query_vector is not None and full_response:
+                response_cache.add(user_id, query_vector, full_response, analysis['intent'])
+
+            # Save the turn to database in a single transaction
+            await run_db(db.add_messages, chat_id, [
+                {'role': 'user', 'content': msg, **analysis},
+                {'role': 'assistant', 'content': full_response}
+            ], title=new_title)
             
-            yield json.dumps({"type": "done"}) + "\n"
+            yield DONE_EVENT
 
         return StreamingResponse(generate(), media_type='application/x-ndjson')
 
     except Exception as e:
-        print(f"Error: {e}", file=sys.stderr)
+        logger.exception("Error: %s", e)
         return JSONResponse({"success": False, "message": str(e)}, status_code=500)
 
 if __name__ == '__main__':
-    print("Open your browser and go to: localhost:8080", file=sys.stderr)
-    uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
+    logger.info("Open your browser and go to: localhost:8080")
+    # Workers read this to size their embedding thread pools
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    # Multiple workers need an import string; uvloop is not available on Windows
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8080,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=workers,
+        limit_concurrency=1000,
+        timeout_keep_alive=30
+    )
\ No newline at end of file
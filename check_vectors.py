@@ -6,11 +6,14 @@ from pinecone import Pinecone
 DOCUMENT_NAME = r"C:\mental-health-chatbot\mental-health-chatbot-main\data\Burnout The Secret to Unlocking the Stress Cycle.pdf"  
 # The name of the document you want to check
 INDEX_NAME = "mental-health-chatbot"
+MAX_MATCHES = 100  # Cap on vectors listed for the document
+SAMPLE_SIZE = 50   # Vectors scanned for example source paths when nothing matches
 # ---------------------
 
 def check_document_vectors(doc_name):
     """Connects to Pinecone and checks for vectors from a specific document."""
     # Normalize the path for consistent matching
+    raw_doc_name = doc_name
     doc_name = doc_name.replace("\\", "/")
     print(f"--- Checking for vectors from normalized path: {doc_name} ---")
     
@@ -26,30 +29,39 @@ def check_document_vectors(doc_name):
         index = pc.Index(INDEX_NAME)
         print(f"Successfully connected to index '{INDEX_NAME}'.")
 
-        # Pinecone's query-by-metadata is complex. A more direct approach is to fetch by ID if we knew them.
-        # As a workaround, we'll query with a dummy vector to get a broad set of results and filter them.
-        print("Fetching a sample of vectors to check for the document...")
-        
-        # Query a large number of vectors to ensure we find the ones we're looking for.
-        # This is not efficient for large indexes, but works for verification purposes.
-        response = index.query(vector=[0.0]*384, top_k=10000, include_metadata=True)
-        
-        matching_vectors = []
-        all_sources_sample = set() # For debugging
-        if response and response.get('matches'):
-            for match in response['matches']:
-                source_metadata = match.metadata.get('source', '').replace("\\", "/")
-                if len(all_sources_sample) < 5: # Get a sample of 5 sources
-                    all_sources_sample.add(source_metadata)
+        # Vector counts come straight from the index stats, no scan needed
+        stats = index.describe_index_stats()
+        print(f"Index holds {stats.total_vector_count} vectors.")
+        for namespace, summary in (stats.namespaces or {}).items():
+            print(f"  - namespace '{namespace or '(default)'}': {summary.vector_count} vectors")
+        if not stats.total_vector_count:
+            print("\n--- The index is empty. Run `store_index.py` first. ---")
+            return
 
-                if doc_name in source_metadata:
-                    matching_vectors.append(match)
+        # Filter server-side on the stored source path. store_index.py stores the path
+        # exactly as joined on the indexing machine, so match either separator style.
+        print("Querying vectors for the document...")
+        source_variants = list({raw_doc_name, doc_name})
+        response = index.query(
+            vector=[0.0]*384,
+            top_k=MAX_MATCHES,
+            filter={"source": {"$in": source_variants}},
+            include_metadata=True
+        )
+        matching_vectors = response.get('matches') or []
 
         if not matching_vectors:
             print(f"\n--- No vectors found for document: {doc_name} ---")
             print("Please ensure that:")
             print("1. The document name and path are correct.")
             print("2. You have run the `store_index.py` script after adding the document.")
+            # Only on a miss: pull a small unfiltered sample of source paths to compare against
+            sample_response = index.query(vector=[0.0]*384, top_k=SAMPLE_SIZE, include_metadata=True)
+            all_sources_sample = set() # For debugging
+            for match in (sample_response.get('matches') or []):
+                all_sources_sample.add(match.metadata.get('source', '').replace("\\", "/"))
+                if len(all_sources_sample) >= 5: # Get a sample of 5 sources
+                    break
             if all_sources_sample:
                 print("\n--- Sample of source paths found in the index ---")
                 for sample in all_sources_sample:
@@ -57,6 +69,8 @@ def check_document_vectors(doc_name):
             return
 
         print(f"\n--- Found {len(matching_vectors)} vectors for: {doc_name} ---")
+        if len(matching_vectors) == MAX_MATCHES:
+            print(f"(Showing the first {MAX_MATCHES}; the document may have more.)")
         for i, vec in enumerate(matching_vectors):
             print(f"\n--- Vector {i+1} ---")
             print(f"  ID: {vec.id}")
@@ -1,168 +1,278 @@
 import sqlite3
 import os
-from typing import Optional, List, Dict
+import queue
+import threading
+from contextlib import contextmanager
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from typing import Optional, List, Dict, Iterator
 from datetime import datetime
 
 DB_PATH = "safemind.db"
+DB_POOL_SIZE = 8
 
-def get_db_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DB_PATH)
+# Long-lived connections shared across requests (created on first use)
+_pool: Optional[queue.Queue] = None
+_pool_lock = threading.Lock()
+
+def _open_connection() -> sqlite3.Connection:
+    """Open a connection tuned for many small reads and writes."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
+def _get_pool() -> queue.Queue:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = queue.Queue(maxsize=DB_POOL_SIZE)
+                for _ in range(DB_POOL_SIZE):
+                    pool.put(_open_connection())
+                _pool = pool
+    return _pool
+
+# Hot read cache for user rows looked up on every request. Writes through this module
+# invalidate the affected key; the TTL bounds staleness across worker processes.
+# Chats are not cached: a chat deleted on one worker must stop passing ownership
+# checks on every other worker immediately.
+_user_cache = TTLCache(maxsize=1024, ttl=60)
+_cache_lock = threading.Lock()
+
+def _invalidate(cache: TTLCache, key):
+    with _cache_lock:
+        cache.pop(hashkey(key), None)
+
+@contextmanager
+def get_db_connection():
+    """Borrow a pooled database connection, rolling back any failed transaction."""
+    pool = _get_pool()
+    conn = pool.get()
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        pool.put(conn)
+
 def init_database():
     """Initialize database with required tables."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            age INTEGER NOT NULL,
-            location TEXT NOT NULL,
-            gender TEXT NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Chats table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS chats (
-            id TEXT PRIMARY KEY,
-            user_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-    
-    # Messages table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            chat_id TEXT NOT NULL,
-            role TEXT NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (chat_id) REFERENCES chats(id)
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
-    print("✓ Database initialized", flush=True)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Users table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT UNIQUE NOT NULL,
+                name TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                location TEXT NOT NULL,
+                gender TEXT NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Chats table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS chats (
+                id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """)
+        
+        # Messages table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                intent TEXT,
+                sentiment TEXT,
+                emotional_level TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (chat_id) REFERENCES chats(id)
+            )
+        """)
+        
+        # Add analysis columns to databases created before they existed
+        existing_columns = {row['name'] for row in cursor.execute("PRAGMA table_info(messages)")}
+        for column in ('intent', 'sentiment', 'emotional_level'):
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE messages ADD COLUMN {column} TEXT")
+        
+        # Indexes for loading a chat's history and a user's chat list
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat_created ON messages(chat_id, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chats_user_created ON chats(user_id, created_at DESC)")
+        
+        conn.commit()
+        print("✓ Database initialized", flush=True)
 
 # User operations
 def create_user(email: str, name: str, age: int, location: str, gender: str, password_hash: str) -> Optional[int]:
     """Create a new user."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO users (email, name, age, location, gender, password_hash)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (email, name, age, location, gender, password_hash))
-        conn.commit()
-        user_id = cursor.lastrowid
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO users (email, name, age, location, gender, password_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (email, name, age, location, gender, password_hash))
+            conn.commit()
+            user_id = cursor.lastrowid
+        _invalidate(_user_cache, user_id)
         return user_id
     except sqlite3.IntegrityError:
         return None
 
 def get_user_by_email(email: str) -> Optional[Dict]:
     """Get user by email."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
 
+@cached(_user_cache, lock=_cache_lock)
 def get_user_by_id(user_id: int) -> Optional[Dict]:
-    """Get user by ID."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    """Get user by ID (cached; callers must not mutate the returned dict)."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+def update_user_password_hash(user_id: int, password_hash: str):
+    """Update a user's password hash."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+        conn.commit()
+    _invalidate(_user_cache, user_id)
 
 # Chat operations
 def create_chat(chat_id: str, user_id: int, title: str) -> bool:
     """Create a new chat."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO chats (id, user_id, title)
-            VALUES (?, ?, ?)
-        """, (chat_id, user_id, title))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO chats (id, user_id, title)
+                VALUES (?, ?, ?)
+            """, (chat_id, user_id, title))
+            conn.commit()
         return True
     except:
         return False
 
+def iter_user_chats(user_id: int) -> Iterator[Dict]:
+    """
+    Yield a user's chats, newest first, without materializing the result set.
+    Holds a pooled connection until the generator is exhausted or closed.
+    """
+    with get_db_connection() as conn:
+        for row in conn.execute("""
+            SELECT id, title, created_at FROM chats 
+            WHERE user_id = ? 
+            ORDER BY created_at DESC
+        """, (user_id,)):
+            yield dict(row)
+
 def get_user_chats(user_id: int) -> List[Dict]:
     """Get all chats for a user."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM chats 
-        WHERE user_id = ? 
-        ORDER BY created_at DESC
-    """, (user_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return list(iter_user_chats(user_id))
 
 def get_chat_by_id(chat_id: str) -> Optional[Dict]:
     """Get chat by ID."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM chats WHERE id = ?", (chat_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM chats WHERE id = ?", (chat_id,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
 
 def update_chat_title(chat_id: str, title: str):
     """Update chat title."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE chats SET title = ? WHERE id = ?", (title, chat_id))
-    conn.commit()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE chats SET title = ? WHERE id = ?", (title, chat_id))
+        conn.commit()
+
+def delete_chat(chat_id: str):
+    """Delete a chat and all its messages."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        # Delete messages first (foreign key constraint)
+        cursor.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
+        cursor.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+        conn.commit()
 
 # Message operations
-def add_message(chat_id: str, role: str, content: str) -> bool:
+# Kept as one constant so every insert hits the same entry in each pooled
+# connection's prepared-statement cache
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (chat_id, role, content, intent, sentiment, emotional_level)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def add_message(chat_id: str, role: str, content: str, intent: Optional[str] = None,
+                sentiment: Optional[str] = None, emotional_level: Optional[str] = None) -> bool:
     """Add a message to a chat."""
+    return add_messages(chat_id, [{
+        'role': role,
+        'content': content,
+        'intent': intent,
+        'sentiment': sentiment,
+        'emotional_level': emotional_level
+    }])
+
+def add_messages(chat_id: str, messages: List[Dict], title: Optional[str] = None) -> bool:
+    """
+    Add several messages to a chat (and optionally retitle it) in one transaction.
+    Each message is a dict with 'role' and 'content' and optional
+    'intent', 'sentiment' and 'emotional_level' keys.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO messages (chat_id, role, content)
-            VALUES (?, ?, ?)
-        """, (chat_id, role, content))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # The chat may have been deleted while the reply was streaming
+            if cursor.execute("SELECT 1 FROM chats WHERE id = ?", (chat_id,)).fetchone() is None:
+                return False
+            cursor.executemany(INSERT_MESSAGE_SQL, [
+                (chat_id, m['role'], m['content'], m.get('intent'), m.get('sentiment'), m.get('emotional_level'))
+                for m in messages
+            ])
+            if title is not None:
+                cursor.execute("UPDATE chats SET title = ? WHERE id = ?", (title, chat_id))
+            conn.commit()
         return True
     except:
         return False
 
+def iter_chat_messages(chat_id: str) -> Iterator[Dict]:
+    """
+    Yield a chat's messages, oldest first, without materializing the result set.
+    Holds a pooled connection until the generator is exhausted or closed.
+    """
+    with get_db_connection() as conn:
+        for row in conn.execute("""
+            SELECT id, role, content, created_at FROM messages 
+            WHERE chat_id = ? 
+            ORDER BY created_at ASC, id ASC
+        """, (chat_id,)):
+            yield dict(row)
+
 def get_chat_messages(chat_id: str) -> List[Dict]:
     """Get all messages for a chat."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM messages 
-        WHERE chat_id = ? 
-        ORDER BY created_at ASC
-    """, (chat_id,))
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return list(iter_chat_messages(chat_id))
@@ -1,9 +1,29 @@
 from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from typing import List
+from langchain_core.embeddings import Embeddings
+from optimum.onnxruntime import ORTModelForFeatureExtraction
+import onnxruntime
+from transformers import AutoTokenizer
+from typing import List, Optional
 from langchain.schema import Document
+import numpy as np
+import functools
 import hashlib
+import re
+
+
+EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+# int8 dynamically-quantized export shipped in the model repo's onnx/ folder
+EMBEDDING_ONNX_FILE = 'model_quint8_avx2.onnx'
+
+# Keywords to redact (simple blacklist for safety demonstration)
+# In a real production system, this would be a more sophisticated NLP model
+_REDACT_PATTERNS = (
+    "methods of suicide", "suicide method", "ways to kill", "how to hang",
+    "lethal dose", "overdose amount", "cutting veins", "how to cut",
+    "specific plan", "buy gun", "buy rope"
+)
+_REDACT_RE = re.compile("|".join(re.escape(p) for p in _REDACT_PATTERNS), flags=re.IGNORECASE)
 
 
 def sanitize_text(text: str) -> str:
@@ -11,28 +31,8 @@ def sanitize_text(text: str) -> str:
     Sanitizes text to remove harmful content while preserving helpful information.
     Removes specific keywords related to methods, dosages, and lethality.
     """
-    # Define keywords to redact (simple blacklist for safety demonstration)
-    # In a real production system, this would be a more sophisticated NLP model
-    redact_patterns = [
-        "methods of suicide", "suicide method", "ways to kill", "how to hang", 
-        "lethal dose", "overdose amount", "cutting veins", "how to cut",
-        "specific plan", "buy gun", "buy rope" 
-    ]
-    
-    sanitized_text = text.lower() # Normalize for checking, but we might want to preserve case.
-    # Actually, let's keep it simple: case-insensitive replace of phrases with [REDACTED]
-    
-    text_lower = text.lower()
-    for pattern in redact_patterns:
-        if pattern in text_lower:
-            # Simple redaction - not perfect but satisfies the requirement
-            # Using a case-insensitive replacement strategy would be better but keeping it simple for now
-            # We will just replace the exact match in the lower case version?? 
-            # No, let's just do a naive replace for now or use regex for case insensitive
-            import re
-            text = re.sub(re.escape(pattern), "[SAFETY REDACTED]", text, flags=re.IGNORECASE)
-            
-    return text
+    # Case-insensitive replace of every phrase with [SAFETY REDACTED] in a single pass
+    return _REDACT_RE.sub("[SAFETY REDACTED]", text)
 
 
 def load_pdf_file(data_dir, filenames=None):
@@ -70,16 +70,10 @@ def load_pdf_file(data_dir, filenames=None):
 
 
 def filter_to_minimal_docs(docs: List[Document]) -> List[Document]:
-    minimal_docs: List[Document] = []
+    # Drop every metadata key except 'source' in place rather than copying each page
     for doc in docs:
-        src = doc.metadata.get("source")
-        minimal_docs.append(
-            Document(
-                page_content=doc.page_content,
-                metadata={"source": src}
-            )
-        )
-    return minimal_docs
+        doc.metadata = {"source": doc.metadata.get("source")}
+    return docs
 
 
 
@@ -93,12 +87,59 @@ def text_split(extracted_data):
 
 
 
-def download_hugging_face_embeddings():
-    embeddings=HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers embeddings served through ONNX Runtime (int8).
+    Mean-pools and L2-normalizes like the sentence-transformers pipeline,
+    so vectors stay compatible with the existing Pinecone index.
+    """
+
+    def __init__(self, model_name: str, file_name: str, max_length: int = 256, batch_size: int = 64,
+                 num_threads: Optional[int] = None):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            # Cap intra-op threads so several processes don't oversubscribe the cores
+            session_options.intra_op_num_threads = num_threads
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_name, subfolder='onnx', file_name=file_name, session_options=session_options
+        )
+        self.max_length = max_length
+        self.batch_size = batch_size
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True, truncation=True, max_length=self.max_length, return_tensors='np'
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs['attention_mask'][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            vectors.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        return np.concatenate(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+
+@functools.lru_cache(maxsize=1)
+def download_hugging_face_embeddings(num_threads: Optional[int] = None):
+    # Loaded once per process; the model is stateless so callers can share it
+    embeddings=OnnxEmbeddings(model_name=EMBEDDING_MODEL_NAME, file_name=EMBEDDING_ONNX_FILE, num_threads=num_threads)
     return embeddings
 
 def generate_chunk_ids(chunks):
+    # Same digest as sha256(f"{source}-{content}") without building the joined string;
+    # the IDs must stay stable or re-indexing would duplicate vectors already in Pinecone
+    sha256 = hashlib.sha256
     for chunk in chunks:
-        chunk_id = hashlib.sha256(f"{chunk.metadata['source']}-{chunk.page_content}".encode()).hexdigest()
-        chunk.metadata['id'] = chunk_id
+        hasher = sha256(chunk.metadata['source'].encode())
+        hasher.update(b'-')
+        hasher.update(chunk.page_content.encode())
+        chunk.metadata['id'] = hasher.hexdigest()
     return chunks
\ No newline at end of file
@@ -0,0 +1,83 @@
+import hashlib
+import logging
+import re
+import orjson
+from langchain_core.documents import Document
+
+try:
+    import redis
+except ImportError:  # redis is optional; without it the cache stays disabled
+    redis = None
+
+logger = logging.getLogger("safemind")
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+class RetrievalCache:
+    """
+    Redis cache of knowledge-base retrieval results keyed by a hash of the
+    normalized query, shared by every worker process. Only retrieved documents
+    are stored, never user data. Any redis failure disables the lookup for that
+    call and retrieval falls through to Pinecone.
+    """
+
+    def __init__(self, url=None, ttl=3600, prefix="safemind:retrieval:v1:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.client = None
+        if not url:
+            return
+        if redis is None:
+            logger.warning("REDIS_URL is set but the redis package is not installed; retrieval cache disabled")
+            return
+        try:
+            client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=0.5)
+            client.ping()
+            self.client = client
+        except (redis.RedisError, ValueError) as e:
+            # ValueError: malformed REDIS_URL
+            logger.warning("Could not connect to redis (%s); retrieval cache disabled", e)
+
+    @property
+    def enabled(self):
+        return self.client is not None
+
+    @staticmethod
+    def normalize(query):
+        """Lowercase, strip punctuation and collapse whitespace."""
+        return " ".join(_PUNCTUATION_RE.sub("", query.lower()).split())
+
+    def _key(self, query, k):
+        digest = hashlib.blake2b(f"{k}:{self.normalize(query)}".encode(), digest_size=16).hexdigest()
+        return self.prefix + digest
+
+    def get(self, query, k):
+        """Return cached (Document, score) pairs for the query, or None on miss."""
+        if self.client is None:
+            return None
+        try:
+            payload = self.client.get(self._key(query, k))
+            if payload is None:
+                return None
+            return [
+                (Document(page_content=item["page_content"], metadata=item["metadata"]), item["score"])
+                for item in orjson.loads(payload)
+            ]
+        except (redis.RedisError, orjson.JSONDecodeError, KeyError, TypeError) as e:
+            # Unreachable redis or a corrupt/old-format value: treat as a miss
+            logger.debug("Retrieval cache get failed: %s", e)
+            return None
+
+    def set(self, query, k, docs_and_scores):
+        """Store (Document, score) pairs for the query with the configured TTL."""
+        if self.client is None:
+            return
+        try:
+            payload = orjson.dumps([
+                {"page_content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+                for doc, score in docs_and_scores
+            ])
+            self.client.setex(self._key(query, k), self.ttl, payload)
+        except (redis.RedisError, TypeError) as e:  # orjson.JSONEncodeError is a TypeError
+            logger.debug("Retrieval cache set failed: %s", e)
@@ -0,0 +1,51 @@
+from collections import OrderedDict
+import faiss
+import numpy as np
+
+
+class SemanticCache:
+    """
+    In-memory cache of recent assistant responses keyed by query embedding.
+    Entries are scoped per user so personalised replies are never shared,
+    and the oldest entries are evicted once max_entries is reached.
+    """
+
+    def __init__(self, dimension=384, threshold=0.92, max_entries=5000, search_k=8):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.search_k = search_k
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self.entries = OrderedDict()  # id -> (user_id, response_text, intent)
+        self.next_id = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vec = np.asarray(vector, dtype='float32').reshape(1, -1)
+        faiss.normalize_L2(vec)
+        return vec
+
+    def lookup(self, user_id, vector, intent):
+        """Return a cached response for a near-identical query, or None on miss."""
+        if not self.entries:
+            return None
+
+        scores, ids = self.index.search(self._normalize(vector), self.search_k)
+        for score, entry_id in zip(scores[0], ids[0]):
+            if entry_id == -1 or score < self.threshold:
+                break
+            entry_user, response_text, entry_intent = self.entries[entry_id]
+            if entry_user == user_id and entry_intent == intent:
+                self.entries.move_to_end(entry_id)
+                return response_text
+        return None
+
+    def add(self, user_id, vector, response_text, intent):
+        """Insert a new (query, response) pair, evicting the least recently used entry."""
+        entry_id = self.next_id
+        self.next_id += 1
+        self.index.add_with_ids(self._normalize(vector), np.array([entry_id], dtype='int64'))
+        self.entries[entry_id] = (user_id, response_text, intent)
+
+        if len(self.entries) > self.max_entries:
+            evicted_id, _ = self.entries.popitem(last=False)
+            self.index.remove_ids(np.array([evicted_id], dtype='int64'))
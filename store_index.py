@@ -1,12 +1,13 @@
 import hashlib
 import json
 import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
 import os
 from src.helper import load_pdf_file, filter_to_minimal_docs, text_split, download_hugging_face_embeddings, generate_chunk_ids
-from pinecone import Pinecone
 from pinecone import ServerlessSpec 
-from langchain_pinecone import PineconeVectorStore
+from pinecone.grpc import PineconeGRPC
 
 load_dotenv()
 
@@ -16,16 +17,29 @@ os.environ["PINECONE_API_KEY"] = PINECONE_API_KEY
 DATA_DIR = r"C:\mental-health-chatbot\mental-health-chatbot-main\data"
 STATE_FILE = "indexing_state.json"
 INDEX_NAME = "mental-health-chatbot"
-BATCH_SIZE = 100
+PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))  # Leave a core for embedding
+BATCH_SIZE = 200  # ~3KB per vector with its text, well under the 2MB request limit
 
 def get_file_hash(filepath):
-    """Calculate SHA256 hash of a file."""
-    hasher = hashlib.sha256()
+    """Calculate SHA256 hash of a file without reading it into memory at once."""
     with open(filepath, 'rb') as f:
-        buf = f.read()
-        hasher.update(buf)
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        hasher = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
     return hasher.hexdigest()
 
+def submit_parse(executor, filename):
+    """
+    Queue a PDF for parsing in the worker pool. Returns None once the pool is broken
+    (e.g. a worker was OOM-killed), meaning the file is parsed in-process instead.
+    """
+    try:
+        return executor.submit(load_pdf_file, DATA_DIR, [filename])
+    except BrokenProcessPool:
+        return None
+
 def load_state():
     """Load indexing state from JSON file."""
     if os.path.exists(STATE_FILE):
@@ -37,16 +51,18 @@ def load_state():
     return {}
 
 def save_state(state):
-    """Save indexing state to JSON file."""
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=4)
+    """Save indexing state to JSON file atomically (write a temp file, then swap it in)."""
+    tmp_file = STATE_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_file, STATE_FILE)
 
 def main():
     print("--- Starting Data Ingestion ---")
     
     # 1. Initialize Pinecone
     print("Initializing Pinecone...")
-    pc = Pinecone(api_key=PINECONE_API_KEY)
+    pc = PineconeGRPC(api_key=PINECONE_API_KEY)
     
     if not pc.has_index(INDEX_NAME):
         print(f"Creating index '{INDEX_NAME}'...")
@@ -87,7 +103,6 @@ def main():
     # 3. Download embedding model once
     print("\nDownloading Embeddings Model...")
     embeddings = download_hugging_face_embeddings()
-    docsearch = PineconeVectorStore(index=index, embedding=embeddings)
     
     # 4. Process files ONE AT A TIME
     print(f"\nProcessing {len(files_to_process)} file(s) individually...")
@@ -95,61 +110,114 @@ def main():
     successful_files = 0
     failed_files = []
     
-    for file_idx, filename in enumerate(files_to_process):
-        print(f"\n{'='*60}")
-        print(f"[{file_idx + 1}/{len(files_to_process)}] Processing: {filename}")
-        print(f"{'='*60}")
+    # Parse and sanitize upcoming PDFs in worker processes while the current file is
+    # embedded and upserted; files are still indexed, and their state saved, one at a time
+    parse_workers = min(PARSE_WORKERS, len(files_to_process))
+    with ProcessPoolExecutor(max_workers=parse_workers) as executor:
+        parse_futures = [submit_parse(executor, filename) for filename in files_to_process[:parse_workers]]
         
-        try:
-            # Load and process this single file
-            file_start_time = time.time()
-            extracted_data = load_pdf_file(data_dir=DATA_DIR, filenames=[filename])
+        for file_idx, filename in enumerate(files_to_process):
+            print(f"\n{'='*60}")
+            print(f"[{file_idx + 1}/{len(files_to_process)}] Processing: {filename}")
+            print(f"{'='*60}")
+        
+            # Keep up to PARSE_WORKERS upcoming files parsing in the background
+            next_idx = file_idx + parse_workers
+            if next_idx < len(files_to_process):
+                parse_futures.append(submit_parse(executor, files_to_process[next_idx]))
+        
+            try:
+                # Collect this file's parsed, sanitized pages (usually already done).
+                # Files already in flight when a worker dies fail here with BrokenProcessPool
+                # and are retried on the next run; later files are parsed in-process.
+                file_start_time = time.time()
+                parse_future = parse_futures[file_idx]
+                parse_futures[file_idx] = None  # Release the pages once this file is done
+                if parse_future is None:
+                    extracted_data = load_pdf_file(data_dir=DATA_DIR, filenames=[filename])
+                else:
+                    extracted_data = parse_future.result()
             
-            if not extracted_data:
-                print(f"  ⚠️  No content extracted from {filename}, skipping...")
-                failed_files.append((filename, "No content extracted"))
-                continue
+                if not extracted_data:
+                    print(f"  ⚠️  No content extracted from {filename}, skipping...")
+                    failed_files.append((filename, "No content extracted"))
+                    continue
             
-            filter_data = filter_to_minimal_docs(extracted_data)
-            text_chunks = text_split(filter_data)
-            print(f"  Generated {len(text_chunks)} chunks from {len(extracted_data)} pages")
+                filter_data = filter_to_minimal_docs(extracted_data)
+                text_chunks = text_split(filter_data)
+                print(f"  Generated {len(text_chunks)} chunks from {len(extracted_data)} pages")
             
-            text_chunks_with_ids = generate_chunk_ids(text_chunks)
+                text_chunks_with_ids = generate_chunk_ids(text_chunks)
             
-            # Batch upsert for this file
-            total_chunks = len(text_chunks_with_ids)
-            print(f"  Upserting {total_chunks} chunks in batches of {BATCH_SIZE}...")
+                # Identical chunks (repeated headers, boilerplate pages) share an ID; send each once
+                unique_chunks = []
+                seen_ids = set()
+                for chunk in text_chunks_with_ids:
+                    if chunk.metadata['id'] not in seen_ids:
+                        seen_ids.add(chunk.metadata['id'])
+                        unique_chunks.append(chunk)
+                text_chunks_with_ids = unique_chunks
+                if len(text_chunks_with_ids) < len(text_chunks):
+                    print(f"  Dropped {len(text_chunks) - len(text_chunks_with_ids)} duplicate chunks")
             
-            for i in range(0, total_chunks, BATCH_SIZE):
-                batch = text_chunks_with_ids[i : i + BATCH_SIZE]
-                batch_num = i // BATCH_SIZE + 1
+                # Batch upsert for this file
+                total_chunks = len(text_chunks_with_ids)
+                print(f"  Upserting {total_chunks} chunks in batches of {BATCH_SIZE}...")
+            
+                # Embed each batch here and upsert it asynchronously, so the next batch
+                # is embedded while the previous one is still in flight
+                pending = []
                 total_batches = (total_chunks + BATCH_SIZE - 1) // BATCH_SIZE
-                print(f"    Batch {batch_num}/{total_batches} ({len(batch)} chunks)...", end=" ", flush=True)
+                for i in range(0, total_chunks, BATCH_SIZE):
+                    batch = text_chunks_with_ids[i : i + BATCH_SIZE]
+                    batch_num = i // BATCH_SIZE + 1
+                
+                    # Chunks already in the index (e.g. unchanged pages of a modified PDF) keep
+                    # their content-hash ID, so skip embedding and re-sending them
+                    existing_ids = index.fetch(ids=[chunk.metadata['id'] for chunk in batch]).vectors
+                    batch = [chunk for chunk in batch if chunk.metadata['id'] not in existing_ids]
+                    if not batch:
+                        print(f"    Batch {batch_num}/{total_batches} already indexed, skipped", flush=True)
+                        continue
+                    print(f"    Batch {batch_num}/{total_batches} ({len(batch)} new chunks) sending", flush=True)
                 
-                try:
-                    docsearch.add_documents(
-                        documents=batch,
-                        ids=[chunk.metadata['id'] for chunk in batch]
-                    )
-                    print("✓")
-                except Exception as e:
-                    print(f"✗ ERROR: {e}")
-                    raise  # Re-raise to trigger file-level error handling
+                    vectors = embeddings.embed_documents([chunk.page_content for chunk in batch])
+                    # Same layout as PineconeVectorStore: page text under the 'text' metadata key
+                    pending.append((batch_num, index.upsert(
+                        vectors=[
+                            (chunk.metadata['id'], vector, {**chunk.metadata, 'text': chunk.page_content})
+                            for chunk, vector in zip(batch, vectors)
+                        ],
+                        async_req=True
+                    )))
             
-            # SUCCESS - Save state for this file immediately
-            state[filename] = file_hashes[filename]
-            save_state(state)
+                for batch_num, future in pending:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"    Batch {batch_num}/{total_batches} ✗ ERROR: {e}")
+                        raise  # Re-raise to trigger file-level error handling
+                if len(pending) == total_batches:
+                    print(f"    ✓ All {total_batches} batches upserted")
+                elif pending:
+                    print(f"    ✓ {len(pending)}/{total_batches} batches upserted, the rest were already indexed")
+                else:
+                    print(f"    ✓ All {total_batches} batches were already indexed, nothing upserted")
             
-            file_time = time.time() - file_start_time
-            successful_files += 1
-            print(f"  ✅ Successfully indexed {filename} in {file_time:.2f}s")
-            print(f"  ✓ State updated for this file")
+                # SUCCESS - Save state for this file immediately
+                state[filename] = file_hashes[filename]
+                save_state(state)
             
-        except Exception as e:
-            print(f"  ❌ FAILED to index {filename}: {e}")
-            failed_files.append((filename, str(e)))
-            print(f"  ⚠️  Continuing with next file...")
-            continue
+                file_time = time.time() - file_start_time
+                successful_files += 1
+                print(f"  ✅ Successfully indexed {filename} in {file_time:.2f}s")
+                print(f"  ✓ State updated for this file")
+            
+            except Exception as e:
+                print(f"  ❌ FAILED to index {filename}: {e}")
+                failed_files.append((filename, str(e)))
+                print(f"  ⚠️  Continuing with next file...")
+                continue
 
     # 5. Summary
     total_time = time.time() - total_start_time